@@ -1,9 +1,15 @@
+import os
+import shutil
+import time
+import urllib.error
+import urllib.request
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
 # Set page configuration
@@ -20,20 +26,188 @@ This interactive dashboard visualizes COVID-19 trends across countries using dat
 Select countries and date ranges to explore cases, deaths, and vaccination data.
 """)
 
+# Data source and local Parquet cache
+DATA_URL = "https://covid.ourworldindata.org/data/owid-covid-data.csv"
+PARQUET_CACHE = "owid.parquet"
+PARQUET_MAX_AGE = 24 * 3600  # Re-download the CSV once the cache is a day old
+CSV_DOWNLOAD = "owid.csv.part"  # Partial download, kept so an interrupted cold start can resume
+CSV_VALIDATOR = CSV_DOWNLOAD + ".validator"  # ETag/Last-Modified of the file the partial bytes came from
+DOWNLOAD_CHUNK = 1 << 20  # Stream the CSV to disk 1 MB at a time
+DOWNLOAD_TIMEOUT = 30  # Seconds a stalled connection may block before the download fails
+
+# Only the columns the dashboard actually uses (the full dataset has ~70)
+NEEDED_COLS = [
+    'iso_code', 'location', 'date',
+    'total_cases', 'new_cases', 'total_deaths', 'new_deaths',
+    'total_vaccinations', 'people_vaccinated', 'people_fully_vaccinated_per_hundred',
+    'population', 'hosp_patients', 'icu_patients',
+    'total_cases_per_million', 'total_deaths_per_million'
+]
+NEEDED_NUMERIC = [c for c in NEEDED_COLS if c not in ('iso_code', 'location', 'date')]
+
+# Cumulative counts run into the billions, past float32's exact-integer range, so they stay float64
+CUMULATIVE_COLS = ['total_cases', 'total_deaths', 'total_vaccinations', 'people_vaccinated', 'population']
+
+# float32 for the small per-day and per-capita columns and categorical codes for the
+# string keys cut the bytes every groupby/ffill/rolling has to move
+NEEDED_DTYPES = {c: 'float64' if c in CUMULATIVE_COLS else 'float32' for c in NEEDED_NUMERIC}
+NEEDED_DTYPES.update({'iso_code': 'category', 'location': 'category'})
+
+# Metrics forward-filled within each country
+KEY_METRICS = ['total_cases', 'new_cases', 'total_deaths', 'new_deaths', 'total_vaccinations', 'people_vaccinated']
+
+# Remove a partial download and its validator
+def discard_download(path=CSV_DOWNLOAD, validator_path=CSV_VALIDATOR):
+    for leftover in (path, validator_path):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+# Stream the CSV to disk, resuming a partial download with a byte-range request.
+# OWID republishes the file daily, so a resume is only attempted with If-Range set to the
+# validator saved with the partial bytes; if the file has changed the server sends it whole
+def download_csv(url, path=CSV_DOWNLOAD, validator_path=CSV_VALIDATOR):
+    done = os.path.getsize(path) if os.path.exists(path) else 0
+    validator = None
+    if done and os.path.exists(validator_path):
+        with open(validator_path) as f:
+            validator = f.read().strip()
+    headers = {'Range': f'bytes={done}-', 'If-Range': validator} if validator else {}
+
+    restart = False
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status == 206:
+                # Same file version; only append if the range starts where our bytes end
+                restart = not response.headers.get('Content-Range', '').startswith(f'bytes {done}-')
+                mode = 'ab'
+            else:
+                # Full download: record which version these bytes belong to before writing any
+                mode = 'wb'
+                new_validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                if new_validator:
+                    with open(validator_path, 'w') as f:
+                        f.write(new_validator)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
+            if not restart:
+                with open(path, mode) as f:
+                    shutil.copyfileobj(response, f, DOWNLOAD_CHUNK)
+    except urllib.error.HTTPError as e:
+        # 416: the unchanged file has nothing past the bytes we already have
+        if e.code != 416:
+            raise
+
+    if restart:
+        discard_download(path, validator_path)
+        download_csv(url, path, validator_path)
+
 # Load data
 @st.cache_data(ttl=3600)  # Cache data for 1 hour
 def load_data():
-    url = "https://covid.ourworldindata.org/data/owid-covid-data.csv"
-    df = pd.read_csv(url)
-    df['date'] = pd.to_datetime(df['date'])
-    return df
+    # Read the pruned Parquet copy if we have a fresh one
+    if os.path.exists(PARQUET_CACHE) and time.time() - os.path.getmtime(PARQUET_CACHE) < PARQUET_MAX_AGE:
+        df = pd.read_parquet(PARQUET_CACHE, columns=NEEDED_COLS)
+    else:
+        # Cold start: download the CSV to disk, parse only the needed columns with the
+        # multi-threaded pyarrow CSV reader, then cache as Parquet
+        download_csv(DATA_URL)
+        try:
+            df = pd.read_csv(CSV_DOWNLOAD, usecols=NEEDED_COLS, dtype=NEEDED_DTYPES, parse_dates=['date'], engine='pyarrow')
+            # Write to a temporary file first so a failed write never leaves a fresh-looking cache
+            df.to_parquet(PARQUET_CACHE + ".tmp", compression='zstd')
+            os.replace(PARQUET_CACHE + ".tmp", PARQUET_CACHE)
+        finally:
+            # A download that parsed is done with; one that didn't must not be resumed
+            discard_download()
+
+    # Derived columns only depend on the raw data, so compute them once per cache load
+    # instead of on every widget change
+    df[KEY_METRICS] = df.groupby('location', sort=False, observed=True)[KEY_METRICS].ffill()
+
+    # Calculate death rate (non-positive case counts become NaN before dividing)
+    total_cases = df['total_cases'].to_numpy()
+    df['death_rate'] = df['total_deaths'].to_numpy() / np.where(total_cases > 0, total_cases, np.nan) * 100
+
+    # Calculate vaccination rate
+    population = df['population'].to_numpy()
+    df['vaccination_rate'] = df['people_vaccinated'].to_numpy() / np.where(population > 0, population, np.nan) * 100
+
+    # Calculate 7-day rolling averages of new cases and deaths
+    rolling = df.groupby('location', observed=True, sort=False)[['new_cases', 'new_deaths']].rolling(window=7, min_periods=1).mean().reset_index(level=0, drop=True)
+    df['rolling_new_cases'] = rolling['new_cases']
+    df['rolling_new_deaths'] = rolling['new_deaths']
+
+    # Sorted date index so date ranges are a binary-search slice instead of a scan
+    # (stable sort keeps each country's rows in date order)
+    df = df.set_index('date').sort_index(kind='stable')
+
+    # Sidebar options and the global map data are cached with the frame they come from,
+    # so reruns don't rescan it and they can never get out of step with it
+    all_countries = sorted(df['location'].unique().tolist())
+    date_bounds = (df.index[0].date(), df.index[-1].date())
+
+    # Latest row per country for the global map; the frame is date-sorted, so the last
+    # row kept for each iso_code is its most recent report
+    latest_global_data = df.drop_duplicates('iso_code', keep='last').reset_index()
+
+    return df, all_countries, date_bounds, latest_global_data
+
+# Global map metrics
+MAP_METRICS = ["total_cases_per_million", "total_deaths_per_million", "people_fully_vaccinated_per_hundred"]
+
+# Build the choropleth trace and geometry once; switching metrics only recolours a copy
+@st.cache_resource(ttl=3600)
+def base_choropleth(_latest_global_data):
+    fig = px.choropleth(
+        _latest_global_data,
+        locations="iso_code",
+        color=MAP_METRICS[0],
+        hover_name="location",
+        color_continuous_scale=px.colors.sequential.Plasma
+    )
+    fig.update_layout(margin={"r":0,"t":30,"l":0,"b":0}, uirevision='keep')
+    return fig
+
+# Downsample line series before plotting
+LTTB_MAX_POINTS = 2000  # Max points per country line sent to the browser
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: keep the first and last point, then from each
+    # bucket keep the point forming the largest triangle with its neighbours
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def downsample_for_plot(data, y, n_out=LTTB_MAX_POINTS):
+    # Only countries with more than n_out rows are thinned; the shape of each line is kept
+    counts = data.groupby('location', observed=True, sort=False).size()
+    if counts.empty or counts.max() <= n_out:
+        return data
+    parts = []
+    for _, group in data.groupby('location', sort=False, observed=True):
+        group = group.sort_values('date')
+        x = group['date'].to_numpy().astype('int64').astype(float)
+        idx = lttb_indices(x, group[y].to_numpy(dtype=float), n_out)
+        parts.append(group.iloc[idx])
+    return pd.concat(parts)
 
 # Show loading message
 with st.spinner('Loading COVID-19 data...'):
-    df = load_data()
-
-# Get list of all countries
-all_countries = sorted(df['location'].unique())
+    df, all_countries, (min_date, max_date), latest_global_data = load_data()
 
 # Sidebar for user inputs
 st.sidebar.header("Filter Data")
@@ -46,9 +220,6 @@ selected_countries = st.sidebar.multiselect(
 )
 
 # Date range selection
-min_date = df['date'].min().date()
-max_date = df['date'].max().date()
-
 # Default to last 6 months
 default_start_date = max_date - timedelta(days=180)
 
@@ -63,33 +234,8 @@ metrics = st.sidebar.multiselect(
 )
 
 # Filter data based on user selection
-filtered_df = df[
-    (df['location'].isin(selected_countries)) & 
-    (df['date'] >= pd.Timestamp(start_date)) & 
-    (df['date'] <= pd.Timestamp(end_date))
-].copy()
-
-# Handle missing values
-key_metrics = ['total_cases', 'new_cases', 'total_deaths', 'new_deaths', 'total_vaccinations', 'people_vaccinated']
-for metric in key_metrics:
-    if metric in filtered_df.columns:
-        filtered_df[metric] = filtered_df.groupby('location')[metric].transform(
-            lambda x: x.fillna(method='ffill')
-        )
-
-# Calculate death rate
-filtered_df['death_rate'] = np.where(
-    (filtered_df['total_cases'] > 0) & (filtered_df['total_deaths'].notna()),
-    filtered_df['total_deaths'] / filtered_df['total_cases'] * 100,
-    np.nan
-)
-
-# Calculate vaccination rate
-filtered_df['vaccination_rate'] = np.where(
-    (filtered_df['population'] > 0) & (filtered_df['people_vaccinated'].notna()),
-    filtered_df['people_vaccinated'] / filtered_df['population'] * 100,
-    np.nan
-)
+filtered_df = df.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+filtered_df = filtered_df[filtered_df['location'].isin(set(selected_countries))].reset_index()
 
 # Display data overview
 st.header("Data Overview")
@@ -98,9 +244,7 @@ st.write(f"Displaying data for {len(selected_countries)} countries from {start_d
 # Show latest statistics
 if not filtered_df.empty:
     # Get latest data for each country
-    latest_data = filtered_df.groupby('location').apply(
-        lambda x: x.sort_values('date').iloc[-1]
-    ).reset_index(drop=True)
+    latest_data = filtered_df.sort_values(['location', 'date']).drop_duplicates('location', keep='last').reset_index(drop=True)
     
     # Create metrics display
     col1, col2, col3, col4 = st.columns(4)
@@ -136,33 +280,31 @@ if "Total Cases" in metrics:
     st.subheader("Total COVID-19 Cases Over Time")
     
     fig = px.line(
-        filtered_df, 
-        x='date', 
-        y='total_cases', 
+        downsample_for_plot(filtered_df, 'total_cases'),
+        x='date',
+        y='total_cases',
         color='location',
         title='Total COVID-19 Cases',
-        labels={'total_cases': 'Total Cases', 'date': 'Date', 'location': 'Country'}
+        labels={'total_cases': 'Total Cases', 'date': 'Date', 'location': 'Country'},
+        render_mode='webgl'
     )
+    fig.update_layout(hovermode='x unified')
     st.plotly_chart(fig, use_container_width=True)
 
 # New Cases (7-day rolling average)
 if "New Cases" in metrics:
     st.subheader("New COVID-19 Cases (7-day Rolling Average)")
     
-    # Calculate 7-day rolling average
-    plot_df = filtered_df.copy()
-    plot_df['rolling_new_cases'] = plot_df.groupby('location')['new_cases'].transform(
-        lambda x: x.rolling(window=7).mean()
-    )
-    
     fig = px.line(
-        plot_df, 
-        x='date', 
-        y='rolling_new_cases', 
+        downsample_for_plot(filtered_df, 'rolling_new_cases'),
+        x='date',
+        y='rolling_new_cases',
         color='location',
         title='7-Day Rolling Average of New Cases',
-        labels={'rolling_new_cases': 'New Cases (7-day avg)', 'date': 'Date', 'location': 'Country'}
+        labels={'rolling_new_cases': 'New Cases (7-day avg)', 'date': 'Date', 'location': 'Country'},
+        render_mode='webgl'
     )
+    fig.update_layout(hovermode='x unified')
     st.plotly_chart(fig, use_container_width=True)
 
 # Total Deaths
@@ -170,33 +312,31 @@ if "Total Deaths" in metrics:
     st.subheader("Total COVID-19 Deaths Over Time")
     
     fig = px.line(
-        filtered_df, 
-        x='date', 
-        y='total_deaths', 
+        downsample_for_plot(filtered_df, 'total_deaths'),
+        x='date',
+        y='total_deaths',
         color='location',
         title='Total COVID-19 Deaths',
-        labels={'total_deaths': 'Total Deaths', 'date': 'Date', 'location': 'Country'}
+        labels={'total_deaths': 'Total Deaths', 'date': 'Date', 'location': 'Country'},
+        render_mode='webgl'
     )
+    fig.update_layout(hovermode='x unified')
     st.plotly_chart(fig, use_container_width=True)
 
 # New Deaths
 if "New Deaths" in metrics:
     st.subheader("New COVID-19 Deaths (7-day Rolling Average)")
     
-    # Calculate 7-day rolling average
-    plot_df = filtered_df.copy()
-    plot_df['rolling_new_deaths'] = plot_df.groupby('location')['new_deaths'].transform(
-        lambda x: x.rolling(window=7).mean()
-    )
-    
     fig = px.line(
-        plot_df, 
-        x='date', 
-        y='rolling_new_deaths', 
+        downsample_for_plot(filtered_df, 'rolling_new_deaths'),
+        x='date',
+        y='rolling_new_deaths',
         color='location',
         title='7-Day Rolling Average of New Deaths',
-        labels={'rolling_new_deaths': 'New Deaths (7-day avg)', 'date': 'Date', 'location': 'Country'}
+        labels={'rolling_new_deaths': 'New Deaths (7-day avg)', 'date': 'Date', 'location': 'Country'},
+        render_mode='webgl'
     )
+    fig.update_layout(hovermode='x unified')
     st.plotly_chart(fig, use_container_width=True)
 
 # Vaccinations
@@ -204,13 +344,15 @@ if "Vaccinations" in metrics:
     st.subheader("COVID-19 Vaccination Progress")
     
     fig = px.line(
-        filtered_df, 
-        x='date', 
-        y='vaccination_rate', 
+        downsample_for_plot(filtered_df, 'vaccination_rate'),
+        x='date',
+        y='vaccination_rate',
         color='location',
         title='Population Vaccination Rate (%)',
-        labels={'vaccination_rate': 'Population Vaccinated (%)', 'date': 'Date', 'location': 'Country'}
+        labels={'vaccination_rate': 'Population Vaccinated (%)', 'date': 'Date', 'location': 'Country'},
+        render_mode='webgl'
     )
+    fig.update_layout(hovermode='x unified')
     st.plotly_chart(fig, use_container_width=True)
     
     # Latest vaccination rates bar chart
@@ -231,36 +373,38 @@ if "Death Rate" in metrics:
     st.subheader("COVID-19 Death Rate Over Time")
     
     fig = px.line(
-        filtered_df, 
-        x='date', 
-        y='death_rate', 
+        downsample_for_plot(filtered_df, 'death_rate'),
+        x='date',
+        y='death_rate',
         color='location',
         title='Death Rate (Deaths/Cases %)',
-        labels={'death_rate': 'Death Rate (%)', 'date': 'Date', 'location': 'Country'}
+        labels={'death_rate': 'Death Rate (%)', 'date': 'Date', 'location': 'Country'},
+        render_mode='webgl'
     )
+    fig.update_layout(hovermode='x unified')
     st.plotly_chart(fig, use_container_width=True)
 
 # Optional: Choropleth Map
 st.header("Global COVID-19 Impact")
 map_metric = st.selectbox(
     "Select metric for global map",
-    options=["total_cases_per_million", "total_deaths_per_million", "people_fully_vaccinated_per_hundred"]
+    options=MAP_METRICS
 )
 
-# Get the latest data for all countries
-latest_global_date = df['date'].max()
-latest_global_data = df[df['date'] == latest_global_date].copy()
-
-# Create choropleth map
-fig = px.choropleth(
-    latest_global_data,
-    locations="iso_code",
-    color=map_metric,
-    hover_name="location",
-    color_continuous_scale=px.colors.sequential.Plasma,
-    title=f"Global COVID-19 Impact: {map_metric.replace('_', ' ').title()}"
+# Recolour a copy of the cached choropleth (the cached figure is shared between sessions).
+# Locations and hover names are set alongside z so the colours always line up with the
+# current data, even if the cached geometry was built from an older snapshot
+fig = go.Figure(base_choropleth(latest_global_data))
+fig.update_traces(
+    locations=latest_global_data['iso_code'].to_numpy(),
+    hovertext=latest_global_data['location'].to_numpy(),
+    z=latest_global_data[map_metric].to_numpy(),
+    hovertemplate=f"<b>%{{hovertext}}</b><br><br>iso_code=%{{location}}<br>{map_metric}=%{{z}}<extra></extra>"
+)
+fig.update_layout(
+    title_text=f"Global COVID-19 Impact: {map_metric.replace('_', ' ').title()}",
+    coloraxis_colorbar_title_text=map_metric
 )
-fig.update_layout(margin={"r":0,"t":30,"l":0,"b":0})
 st.plotly_chart(fig, use_container_width=True)
 
 # Optional: Include hospitalization data if available
@@ -275,25 +419,29 @@ if 'hosp_patients' in df.columns or 'icu_patients' in df.columns:
         # Hospital patients
         if hosp_data_available:
             fig = px.line(
-                filtered_df, 
-                x='date', 
-                y='hosp_patients', 
+                downsample_for_plot(filtered_df, 'hosp_patients'),
+                x='date',
+                y='hosp_patients',
                 color='location',
                 title='COVID-19 Hospital Patients',
-                labels={'hosp_patients': 'Hospital Patients', 'date': 'Date', 'location': 'Country'}
+                labels={'hosp_patients': 'Hospital Patients', 'date': 'Date', 'location': 'Country'},
+                render_mode='webgl'
             )
+            fig.update_layout(hovermode='x unified')
             st.plotly_chart(fig, use_container_width=True)
         
         # ICU patients
         if icu_data_available:
             fig = px.line(
-                filtered_df, 
-                x='date', 
-                y='icu_patients', 
+                downsample_for_plot(filtered_df, 'icu_patients'),
+                x='date',
+                y='icu_patients',
                 color='location',
                 title='COVID-19 ICU Patients',
-                labels={'icu_patients': 'ICU Patients', 'date': 'Date', 'location': 'Country'}
+                labels={'icu_patients': 'ICU Patients', 'date': 'Date', 'location': 'Country'},
+                render_mode='webgl'
             )
+            fig.update_layout(hovermode='x unified')
             st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("Hospital and ICU data not available for the selected countries and time period.")
@@ -311,7 +459,7 @@ Last updated: {}
 st.sidebar.markdown("---")
 st.sidebar.subheader("How to Run This Dashboard")
 st.sidebar.code("streamlit run covid_dashboard.py")
-st.sidebar.markdown("Install Streamlit: `pip install streamlit`")
+st.sidebar.markdown("Install Streamlit: `pip install streamlit pyarrow`")
 
 
 
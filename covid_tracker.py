@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime
+from pathlib import Path
 
 # Set pandas display options
 pd.set_option('display.max_columns', None)
@@ -25,81 +26,53 @@ df['date'] = pd.to_datetime(df['date'])
 
 # Select countries of interest
 countries = ['United States', 'India', 'Brazil', 'United Kingdom', 'Kenya']
-filtered_df = df[df['location'].isin(countries)]
 
-# Create a copy to avoid SettingWithCopyWarning
-filtered_df = filtered_df.copy()
+key_metrics = ['total_cases', 'new_cases', 'total_deaths', 'new_deaths', 'total_vaccinations']
+
+# Copy only the columns the country analysis uses (also avoids SettingWithCopyWarning)
+analysis_cols = ['location', 'date'] + key_metrics + ['people_fully_vaccinated_per_hundred']
+filtered_df = df.loc[df['location'].isin(countries), analysis_cols].copy()
 
 # Handle missing values for key metrics
-key_metrics = ['total_cases', 'new_cases', 'total_deaths', 'new_deaths', 'total_vaccinations']
-for metric in key_metrics:
-    if metric in filtered_df.columns:
-        # Group by country and forward fill missing values
-        filtered_df[metric] = filtered_df.groupby('location')[metric].transform(
-            lambda x: x.fillna(method='ffill')
-        )
+# Group by country and forward fill missing values
+filtered_df[key_metrics] = filtered_df.groupby('location', sort=False, observed=True)[key_metrics].ffill()
 
 # Calculate death rate where data is available
-filtered_df['death_rate'] = np.where(
-    (filtered_df['total_cases'] > 0) & (filtered_df['total_deaths'].notna()),
-    filtered_df['total_deaths'] / filtered_df['total_cases'] * 100,
-    np.nan
-)
+total_cases = filtered_df['total_cases'].to_numpy()
+filtered_df['death_rate'] = filtered_df['total_deaths'].to_numpy() / np.where(total_cases > 0, total_cases, np.nan) * 100
 
 # Set plot style
 sns.set(style="darkgrid")
-plt.figure(figsize=(14, 8))
-
-# Plot total cases over time for selected countries
-plt.figure(figsize=(14, 8))
-for country in countries:
-    country_data = filtered_df[filtered_df['location'] == country]
-    plt.plot(country_data['date'], country_data['total_cases'], label=country)
-
-plt.title('Total COVID-19 Cases Over Time', fontsize=16)
-plt.xlabel('Date', fontsize=12)
-plt.ylabel('Total Cases', fontsize=12)
-plt.legend()
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig('total_cases_over_time.png')
-plt.show()
 
-# Plot total deaths over time
-plt.figure(figsize=(14, 8))
-for country in countries:
-    country_data = filtered_df[filtered_df['location'] == country]
-    plt.plot(country_data['date'], country_data['total_deaths'], label=country)
-
-plt.title('Total COVID-19 Deaths Over Time', fontsize=16)
-plt.xlabel('Date', fontsize=12)
-plt.ylabel('Total Deaths', fontsize=12)
-plt.legend()
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig('total_deaths_over_time.png')
-plt.show()
-
-# Plot vaccination progress
-plt.figure(figsize=(14, 8))
-for country in countries:
-    country_data = filtered_df[filtered_df['location'] == country]
-    plt.plot(country_data['date'], country_data['total_vaccinations'], label=country)
-
-plt.title('COVID-19 Vaccination Progress', fontsize=16)
-plt.xlabel('Date', fontsize=12)
-plt.ylabel('Total Vaccinations', fontsize=12)
-plt.legend()
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig('vaccination_progress.png')
+# Time-series charts share one figure and date axis, so they render in a single pass
+fig, axes = plt.subplots(5, 1, figsize=(14, 30), sharex=True)
+
+wide = filtered_df.pivot(index='date', columns='location',
+                         values=['total_cases', 'total_deaths', 'total_vaccinations', 'death_rate', 'new_cases'])
+panels = [
+    (wide['total_cases'], 'Total COVID-19 Cases Over Time', 'Total Cases'),
+    (wide['total_deaths'], 'Total COVID-19 Deaths Over Time', 'Total Deaths'),
+    (wide['total_vaccinations'], 'COVID-19 Vaccination Progress', 'Total Vaccinations'),
+    (wide['death_rate'], 'COVID-19 Death Rate Over Time (Deaths/Cases %)', 'Death Rate (%)'),
+    # Compare daily new cases (7-day rolling average for smoothing)
+    (wide['new_cases'].rolling(window=7).mean(), '7-Day Rolling Average of New COVID-19 Cases', 'New Cases (7-day avg)')
+]
+for ax, (data, title, ylabel) in zip(axes, panels):
+    data.reindex(columns=countries).plot(ax=ax)
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel('')
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.legend()
+
+axes[-1].set_xlabel('Date', fontsize=12)
+axes[-1].tick_params(axis='x', labelrotation=45)
+fig.tight_layout()
+fig.savefig('covid_overview.png', dpi=100)
 plt.show()
 
 # Compare vaccination rates (people fully vaccinated per hundred)
 # Get the latest data for each country
-latest_data = filtered_df.groupby('location').apply(
-    lambda x: x.sort_values('date').iloc[-1]
-).reset_index(drop=True)
+latest_data = filtered_df.sort_values(['location', 'date']).drop_duplicates('location', keep='last').reset_index(drop=True)
 
 plt.figure(figsize=(12, 6))
 sns.barplot(x='location', y='people_fully_vaccinated_per_hundred', data=latest_data)
@@ -111,57 +84,26 @@ plt.tight_layout()
 plt.savefig('vaccination_rates.png')
 plt.show()
 
-# Compare death rates
-plt.figure(figsize=(14, 8))
-for country in countries:
-    country_data = filtered_df[filtered_df['location'] == country]
-    plt.plot(country_data['date'], country_data['death_rate'], label=country)
-
-plt.title('COVID-19 Death Rate Over Time (Deaths/Cases %)', fontsize=16)
-plt.xlabel('Date', fontsize=12)
-plt.ylabel('Death Rate (%)', fontsize=12)
-plt.legend()
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig('death_rate_over_time.png')
-plt.show()
-
-# Compare daily new cases (7-day rolling average for smoothing)
-plt.figure(figsize=(14, 8))
-for country in countries:
-    country_data = filtered_df[filtered_df['location'] == country]
-    # Calculate 7-day rolling average
-    rolling_avg = country_data['new_cases'].rolling(window=7).mean()
-    plt.plot(country_data['date'], rolling_avg, label=country)
-
-plt.title('7-Day Rolling Average of New COVID-19 Cases', fontsize=16)
-plt.xlabel('Date', fontsize=12)
-plt.ylabel('New Cases (7-day avg)', fontsize=12)
-plt.legend()
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig('new_cases_rolling_avg.png')
-plt.show()
-
 # Generate insights
 print("\n=== COVID-19 Data Analysis Insights ===\n")
 
 # 1. Highest case counts
-latest_data = latest_data.sort_values('total_cases', ascending=False)
+# Sort once per ranking and reuse the results in the summary report
+by_cases = latest_data.sort_values('total_cases', ascending=False)
 print(f"Countries with highest total cases:")
-for i, (idx, row) in enumerate(latest_data.iterrows(), 1):
+for i, (idx, row) in enumerate(by_cases.iterrows(), 1):
     print(f"{i}. {row['location']}: {row['total_cases']:,.0f} cases")
 
 # 2. Highest death rates
-latest_data = latest_data.sort_values('death_rate', ascending=False)
+by_death = latest_data.sort_values('death_rate', ascending=False)
 print(f"\nCountries with highest death rates:")
-for i, (idx, row) in enumerate(latest_data.iterrows(), 1):
+for i, (idx, row) in enumerate(by_death.iterrows(), 1):
     print(f"{i}. {row['location']}: {row['death_rate']:.2f}%")
 
 # 3. Vaccination progress
-latest_data = latest_data.sort_values('people_fully_vaccinated_per_hundred', ascending=False)
+by_vax = latest_data.sort_values('people_fully_vaccinated_per_hundred', ascending=False)
 print(f"\nVaccination progress (% fully vaccinated):")
-for i, (idx, row) in enumerate(latest_data.iterrows(), 1):
+for i, (idx, row) in enumerate(by_vax.iterrows(), 1):
     if pd.notna(row['people_fully_vaccinated_per_hundred']):
         print(f"{i}. {row['location']}: {row['people_fully_vaccinated_per_hundred']:.2f}%")
     else:
@@ -169,21 +111,22 @@ for i, (idx, row) in enumerate(latest_data.iterrows(), 1):
 
 # 4. Case growth rate (last 30 days)
 print("\nCase growth in the last 30 days:")
+by_country = filtered_df.sort_values(['location', 'date']).groupby('location', sort=False, observed=True)
+current = by_country.nth(-1).set_index('location')['total_cases']
+month_ago = by_country.nth(-30).set_index('location')['total_cases']  # Only countries with >= 30 rows
+growth = ((current - month_ago) / month_ago * 100).where(month_ago > 0, 0)
 for country in countries:
-    country_data = filtered_df[filtered_df['location'] == country].sort_values('date')
-    if len(country_data) >= 30:
-        current = country_data.iloc[-1]['total_cases']
-        month_ago = country_data.iloc[-30]['total_cases']
-        growth = ((current - month_ago) / month_ago * 100) if month_ago > 0 else 0
-        print(f"{country}: {growth:.2f}% increase")
+    if country in month_ago.index:
+        print(f"{country}: {growth[country]:.2f}% increase")
 
 # Optional: Create a choropleth map of cases or vaccinations
 try:
     import plotly.express as px
     
     # Get the latest data for all countries
+    # (the dataset is ordered by country then date, so the last row per iso_code is its latest)
     latest_date = df['date'].max()
-    latest_global_data = df[df['date'] == latest_date].copy()
+    latest_global_data = df.drop_duplicates('iso_code', keep='last')
     
     # Create choropleth map of total cases
     fig = px.choropleth(
@@ -213,32 +156,33 @@ try:
 except ImportError:
     print("Plotly not installed. Skipping choropleth maps.")
 
-# Save a summary report
-with open('covid19_analysis_summary.txt', 'w') as f:
-    f.write("COVID-19 Global Data Tracker - Analysis Summary\n")
-    f.write("=" * 50 + "\n\n")
-    f.write(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d')}\n")
-    f.write(f"Data Source: Our World in Data (up to {latest_date.strftime('%Y-%m-%d')})\n\n")
-    
-    f.write("Key Insights:\n")
-    f.write("1. Case Distribution: ")
-    top_country = latest_data.iloc[0]['location']
-    f.write(f"{top_country} has the highest number of reported cases among analyzed countries.\n")
-    
-    f.write("2. Death Rates: ")
-    highest_dr_country = latest_data.sort_values('death_rate', ascending=False).iloc[0]['location']
-    highest_dr = latest_data.sort_values('death_rate', ascending=False).iloc[0]['death_rate']
-    f.write(f"{highest_dr_country} shows the highest death rate at {highest_dr:.2f}%.\n")
-    
-    f.write("3. Vaccination Progress: ")
-    highest_vax = latest_data.sort_values('people_fully_vaccinated_per_hundred', ascending=False).iloc[0]
-    f.write(f"{highest_vax['location']} leads in vaccination with {highest_vax['people_fully_vaccinated_per_hundred']:.2f}% fully vaccinated.\n")
-    
-    f.write("\nAnalyzed Countries: " + ", ".join(countries) + "\n")
-    
-    f.write("\nGenerated visualizations saved as PNG files in the working directory.\n")
-    if 'plotly' in globals():
-        f.write("Interactive maps saved as HTML files.\n")
+# Save a summary report (built in memory and written in one go)
+top_country = by_cases.iloc[0]
+highest_dr = by_death.iloc[0]
+highest_vax = by_vax.iloc[0]
+report = [
+    "COVID-19 Global Data Tracker - Analysis Summary\n",
+    "=" * 50 + "\n\n",
+    f"Analysis Date: {datetime.now().strftime('%Y-%m-%d')}\n",
+    f"Data Source: Our World in Data (up to {latest_date.strftime('%Y-%m-%d')})\n\n",
+
+    "Key Insights:\n",
+    "1. Case Distribution: ",
+    f"{top_country['location']} has the highest number of reported cases among analyzed countries.\n",
+
+    "2. Death Rates: ",
+    f"{highest_dr['location']} shows the highest death rate at {highest_dr['death_rate']:.2f}%.\n",
+
+    "3. Vaccination Progress: ",
+    f"{highest_vax['location']} leads in vaccination with {highest_vax['people_fully_vaccinated_per_hundred']:.2f}% fully vaccinated.\n",
+
+    "\nAnalyzed Countries: " + ", ".join(countries) + "\n",
+
+    "\nGenerated visualizations saved as PNG files in the working directory.\n",
+]
+if 'plotly' in globals():
+    report.append("Interactive maps saved as HTML files.\n")
+Path('covid19_analysis_summary.txt').write_text("".join(report))
 
 print("\nAnalysis complete! Summary saved to 'covid19_analysis_summary.txt'")
 